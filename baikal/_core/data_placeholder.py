@@ -4,7 +4,7 @@ from baikal._core.utils import make_repr
 
 
 def is_data_placeholder_list(l):
-    return all([isinstance(item, DataPlaceholder) for item in l])
+    return all(isinstance(item, DataPlaceholder) for item in l)
 
 
 # Make it sortable to aid cache hits in Model._get_required_nodes
@@ -22,6 +22,8 @@ class DataPlaceholder:
     instantiate these yourself.
     """
 
+    __slots__ = ("_step", "_port", "_name")
+
     def __init__(self, step, port, name):
         self._step = step
         self._port = port
@@ -43,10 +45,21 @@ class DataPlaceholder:
     def node(self):
         return self.step._nodes[self.port]
 
+    # Needed to pickle with protocols 0 and 1, which require a __dict__ otherwise
+    def __getstate__(self):
+        return self._step, self._port, self._name
+
+    def __setstate__(self, state):
+        self._step, self._port, self._name = state
+
     def __repr__(self):
         attrs = ["step", "port", "name"]
         return make_repr(self, attrs)
 
+    # DataPlaceholders are hashed by identity. Models rely on this
+    # to use them as dictionary keys (e.g. to map them to their data).
+    __hash__ = object.__hash__
+
     def __lt__(self, other):
         if self.__class__ is other.__class__:
             return self._name < other.name
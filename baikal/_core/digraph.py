@@ -89,6 +89,7 @@ class DiGraph:
         n_nodes = len(self._successors)
 
         sorted_nodes = deque(maxlen=n_nodes)
+        sorted_nodes_set = set()
         visited_nodes = set()
         unvisited_nodes = deque(
             sorted(self._predecessors, key=lambda k: len(self._predecessors[k])),
@@ -98,18 +99,30 @@ class DiGraph:
         # It is not mandatory, but to have more intuitive orderings,
         # we start depth-first search from nodes without predecessors (inputs)
 
+        # The search is iterative, with an explicit stack of
+        # (node, successors iterator), to avoid hitting the recursion
+        # limit on deep graphs
         def visit(node):
-            if node in sorted_nodes:
+            if node in sorted_nodes_set:
                 return
-            if node in visited_nodes:
-                raise CyclicDiGraphError("DiGraph is not acyclic.")
 
             visited_nodes.add(node)
-            for successor in self._successors[node]:
-                visit(successor)
-
-            visited_nodes.remove(node)
-            sorted_nodes.appendleft(node)
+            stack = [(node, iter(self._successors[node]))]
+            while stack:
+                node, successors = stack[-1]
+                for successor in successors:
+                    if successor in sorted_nodes_set:
+                        continue
+                    if successor in visited_nodes:
+                        raise CyclicDiGraphError("DiGraph is not acyclic.")
+                    visited_nodes.add(successor)
+                    stack.append((successor, iter(self._successors[successor])))
+                    break
+                else:
+                    stack.pop()
+                    visited_nodes.remove(node)
+                    sorted_nodes.appendleft(node)
+                    sorted_nodes_set.add(node)
 
         while unvisited_nodes:
             next_node = unvisited_nodes.popleft()
@@ -1,11 +1,21 @@
+import numbers
+import os
 from collections import defaultdict
-from typing import Union, List, Dict, Set, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Union, List, Dict, Set, Iterable, Optional, Tuple, Callable
 
 from baikal._core.data_placeholder import is_data_placeholder_list, DataPlaceholder
 from baikal._core.digraph import DiGraph
 from baikal._core.step import Step, InputStep, Node
 from baikal._core.typing import ArrayLike
-from baikal._core.utils import listify, safezip2, SimpleCache, unlistify
+from baikal._core.utils import (
+    listify,
+    safezip2,
+    SimpleCache,
+    LRUCache,
+    unlistify,
+    hash_data,
+)
 
 # Just to avoid function signatures painful to the eye
 DataPlaceHolders = Union[DataPlaceholder, List[DataPlaceholder]]
@@ -55,6 +65,27 @@ class Model(Step):
     name
         Name of the model (optional). If no name is passed, a name will be
         automatically generated.
+
+    n_jobs
+        Number of threads used to run independent steps of the model
+        concurrently during fit and predict (optional). A step is run as soon
+        as all the steps it depends on have finished. ``None`` or ``1`` runs
+        the steps sequentially (default), and negative values follow the
+        joblib convention (``-1`` means using all processors, ``-2`` all but
+        one, and so on). This pays off mostly with steps that release the GIL
+        (e.g. many scikit-learn estimators implemented in C/Cython). Note that
+        steps drawing from the global NumPy random state (i.e. without a
+        ``random_state``) may not run in the same order as when run sequentially,
+        so their results may differ.
+
+    cache_size
+        Maximum number of step outputs cached during predict (optional). Outputs
+        are keyed on the step (at a given port), its version (bumped whenever the
+        step is fit by any model or its ``set_params`` is called) and a hash of its
+        input numpy arrays (steps with other inputs are not cached). Changes made
+        otherwise (e.g. calling the ``fit`` of a step directly) are not detected.
+        Cached outputs are returned without copying. ``None`` disables the cache
+        (default).
     """
 
     def __init__(
@@ -63,6 +94,8 @@ class Model(Step):
         outputs: DataPlaceHolders,
         targets: Optional[DataPlaceHolders] = None,
         name: Optional[str] = None,
+        n_jobs: Optional[int] = None,
+        cache_size: Optional[int] = None,
     ):
         super().__init__(name=name)
 
@@ -85,11 +118,35 @@ class Model(Step):
         self._internal_inputs = inputs
         self._internal_outputs = outputs
         self._internal_targets = targets
+
+        if n_jobs is not None:
+            if not isinstance(n_jobs, numbers.Integral) or isinstance(n_jobs, bool):
+                raise ValueError("n_jobs must be None or an integer.")
+            if n_jobs == 0:
+                raise ValueError("n_jobs == 0 has no meaning.")
+        self.n_jobs = n_jobs
+
+        if cache_size is not None:
+            if not isinstance(cache_size, numbers.Integral) or isinstance(
+                cache_size, bool
+            ):
+                raise ValueError("cache_size must be None or an integer.")
+            if cache_size < 1:
+                raise ValueError("cache_size must be positive.")
+        self._compute_cache = (
+            LRUCache(cache_size) if cache_size is not None else None
+        )  # type: Optional[LRUCache]
         self._build()
 
     def _build(self):
         # Model uses the DiGraph data structure to store and operate on its DataPlaceholder and Steps.
         self._graph = build_graph_from_outputs(self._internal_outputs)
+        self._all_nodes_sorted = (
+            self._graph.topological_sort()
+        )  # Fail early if graph is acyclic
+        self._nodes_order = {
+            node: order for order, node in enumerate(self._all_nodes_sorted)
+        }
 
         # Collect data placeholders
         self._data_placeholders = {}
@@ -97,12 +154,35 @@ class Model(Step):
             for output in node.outputs:
                 self._data_placeholders[output.name] = output
 
+        # Assign an integer slot to each data placeholder, so the intermediate
+        # results can be stored in a list instead of a dict during fit/predict
+        self._slots = {
+            data_placeholder: slot
+            for slot, data_placeholder in enumerate(self._data_placeholders.values())
+        }
+        self._node_slots = {}  # type: Dict[Node, Tuple[Tuple[int, ...], ...]]
+        for node in self._graph:
+            self._node_slots[node] = (
+                tuple(self._slots[input] for input in node.inputs),
+                tuple(self._slots[target] for target in node.targets),
+                tuple(self._slots[output] for output in node.outputs),
+            )
+
         # Collect steps
         self._steps = {node.step.name: node.step for node in self._graph}
 
-        self._all_nodes_sorted = (
-            self._graph.topological_sort()
-        )  # Fail early if graph is acyclic
+        # Collect, in a single pass over the edges, the nodes whose outputs are
+        # consumed by other nodes and the predecessors of each node, so fit and
+        # predict do not have to query the graph at every step
+        nodes_with_successors = set()  # type: Set[Node]
+        self._nodes_predecessors = {
+            node: [] for node in self._graph
+        }  # type: Dict[Node, List[Node]]
+        for from_node, to_node, _ in self._graph.edges:
+            nodes_with_successors.add(from_node)
+            self._nodes_predecessors[to_node].append(from_node)
+        self._nodes_with_successors = frozenset(nodes_with_successors)
+
         self._nodes_cache = SimpleCache()
         self._get_required_nodes(
             self._internal_inputs, self._internal_targets, self._internal_outputs
@@ -156,50 +236,46 @@ class Model(Step):
         given_inputs_found = set()  # type: Set[DataPlaceholder]
         given_targets_found = set()  # type: Set[DataPlaceholder]
         required_nodes = set()  # type: Set[Node]
+        # InputSteps that are reached by backtracking are missing inputs/targets.
+        # We *do not* compare given_inputs_found/given_targets_found with
+        # self._internal_inputs/self._internal_targets because we allow giving
+        # intermediate inputs directly.
+        missing_inputs_or_targets = set()  # type: Set[DataPlaceholder]
 
         # Depth-first search
+        # Implemented iteratively with an explicit stack to avoid recursion overhead
+        # (and recursion limits) on deep graphs.
         # backtracking stops if any of the following happen:
         #   - found a given input or target
         #   - found a known required step
         #   - hit an InputStep
-        def backtrack(output):
-            nodes_required_by_output = set()
+        stack = list(desired_outputs)
+        while stack:
+            output = stack.pop()
 
             if output in given_inputs:
                 given_inputs_found.add(output)
-                return nodes_required_by_output
+                continue
 
             if output in given_targets:
                 given_targets_found.add(output)
-                return nodes_required_by_output
+                continue
 
             parent_node = output.node
             if parent_node in required_nodes:
-                return nodes_required_by_output
-
-            nodes_required_by_output = {parent_node}
-            for input in parent_node.inputs:
-                nodes_required_by_output |= backtrack(input)
+                continue
 
-            if follow_targets and (parent_node.trainable or ignore_trainable_false):
-                for target in parent_node.targets:
-                    nodes_required_by_output |= backtrack(target)
+            required_nodes.add(parent_node)
+            if isinstance(parent_node.step, InputStep):
+                missing_inputs_or_targets.update(parent_node.outputs)
+                continue
 
-            return nodes_required_by_output
+            stack.extend(parent_node.inputs)
 
-        for output in desired_outputs:
-            required_nodes |= backtrack(output)
+            if follow_targets and (parent_node.trainable or ignore_trainable_false):
+                stack.extend(parent_node.targets)
 
         # Check for missing inputs/targets
-        # InputSteps that were reached by backtracking are missing inputs/targets.
-        # We *do not* compare given_inputs_found/given_targets_found with
-        # self._internal_inputs/self._internal_targets because we allow giving
-        # intermediate inputs directly.
-        missing_inputs_or_targets = set()  # type: Set[DataPlaceholder]
-        for node in required_nodes:
-            if isinstance(node.step, InputStep):
-                missing_inputs_or_targets |= set(node.outputs)
-
         if missing_inputs_or_targets:
             raise ValueError(
                 "The following inputs or targets are required but were not given:\n"
@@ -223,9 +299,9 @@ class Model(Step):
                 "{}".format(",".join([target.name for target in unused_targets]))
             )
 
-        required_nodes_sorted = [
-            node for node in self._all_nodes_sorted if node in required_nodes
-        ]
+        required_nodes_sorted = sorted(
+            required_nodes, key=self._nodes_order.__getitem__
+        )
         self._nodes_cache[cache_key] = required_nodes_sorted
 
         return required_nodes_sorted
@@ -348,11 +424,11 @@ class Model(Step):
 
         """
         # TODO: Add better error message to know which step failed in case of any error
-        # TODO: Consider using joblib's Parallel and Memory classes to parallelize and cache computations
-        # In graph parlance, the 'parallelizable' paths of a graph are called 'disjoint paths'
-        # https://stackoverflow.com/questions/37633941/get-list-of-parallel-paths-in-a-directed-graph
         # TODO: How to behave when fit was called on a Model (and Step) that is trainable=False?
 
+        # Steps are about to be re-fit so any cached outputs become stale
+        self._clear_compute_cache()
+
         # input/output normalization
         X_norm = self._normalize_data(X, self._internal_inputs)
         for input in self._internal_inputs:
@@ -385,12 +461,10 @@ class Model(Step):
             fit_params_steps[step][param_name] = param_value
 
         # Intermediate results are stored here
-        # keys: DataPlaceholder instances, values: actual data (e.g. numpy arrays)
-        results_cache = dict()
-        results_cache.update(X_norm)
-        results_cache.update(y_norm)
+        # indices: DataPlaceholder slots, values: actual data (e.g. numpy arrays)
+        results_cache = self._make_results_cache(X_norm, y_norm)
 
-        for node in nodes:
+        def fit_node(node):
             # TODO: Add a step.current_port attribute.
             # This attribute would be useful for introspection
             # during graph runtime to know which port is currently
@@ -400,28 +474,31 @@ class Model(Step):
             # running (i.e. executing Model.fit or Model.predict)
             # and would be set to the appropriate value by the graph
             # runtime via a context manager.
-            Xs = [results_cache[i] for i in node.inputs]
-            successors = list(self.graph.successors(node))
+            input_slots, target_slots, _ = self._node_slots[node]
+            Xs = [results_cache[i] for i in input_slots]
+            has_successors = node in self._nodes_with_successors
 
             if not node.trainable:
-                if successors:
+                if has_successors:
                     self._compute_node(node, Xs, results_cache)
-                continue
+                return
 
-            ys = [results_cache[t] for t in node.targets]
+            ys = [results_cache[t] for t in target_slots]
             fit_params = fit_params_steps.get(node.step, {})
 
             if node.fit_compute_func is not None:
                 self._fit_compute_node(node, Xs, ys, results_cache, **fit_params)
-                continue
+                return
 
             # ----- default behavior
             if node.fit_func is not None:
                 self._fit_node(node, Xs, ys, **fit_params)
 
-            if successors:
+            if has_successors:
                 self._compute_node(node, Xs, results_cache)
 
+        self._execute_nodes(nodes, fit_node)
+
         return self
 
     def predict(
@@ -447,9 +524,6 @@ class Model(Step):
         array-like or list of array-like
             The computed outputs.
         """
-        # Intermediate results are stored here
-        results_cache = dict()  # type: Dict[DataPlaceholder, ArrayLike]
-
         # Normalize inputs
         X_norm = self._normalize_data(X, self._internal_inputs)
 
@@ -469,20 +543,118 @@ class Model(Step):
         )
 
         # Compute
-        results_cache.update(X_norm)
+        # Intermediate results are stored here
+        results_cache = self._make_results_cache(X_norm)
 
-        for node in nodes:
-            Xs = [results_cache[i] for i in node.inputs]
-            self._compute_node(node, Xs, results_cache)
+        def compute_node(node):
+            Xs = [results_cache[i] for i in self._node_slots[node][0]]
+            if self._compute_cache is None:
+                self._compute_node(node, Xs, results_cache)
+                return
 
-        output_data = [results_cache[o] for o in outputs]
+            hashes = tuple(hash_data(X) for X in Xs)
+            if None in hashes:
+                # Some input cannot be hashed cheaply, so compute as usual
+                self._compute_node(node, Xs, results_cache)
+                return
+
+            key = (node, node.step, node.step._get_version(), hashes)
+            output_data = self._compute_cache.get(key)
+            if output_data is None:
+                output_data = self._compute_node(node, Xs, results_cache)
+                self._compute_cache[key] = output_data
+            else:
+                self._update_cache(results_cache, output_data, node)
+
+        self._execute_nodes(nodes, compute_node)
+
+        output_data = [results_cache[self._slots[o]] for o in outputs]
         if len(output_data) == 1:
             return output_data[0]
         else:
             return output_data
 
+    def _execute_nodes(self, nodes: List[Node], execute_node: Callable[[Node], None]):
+        """Executes the given (topologically sorted) nodes, either sequentially
+        or concurrently in a thread pool, depending on n_jobs.
+
+        When running concurrently, a node is dispatched as soon as all its
+        predecessors among the given nodes have finished. Nodes of the same
+        (shared) step are additionally chained in topological order, so a step
+        is never executed by two threads at once and its fit order is the
+        same as when running sequentially.
+        """
+        n_workers = self._get_n_workers()
+        if n_workers == 1 or len(nodes) < 2:
+            for node in nodes:
+                execute_node(node)
+            return
+
+        nodes_set = set(nodes)
+        n_pending = {}  # type: Dict[Node, int]
+        dependents = defaultdict(list)  # type: Dict[Node, List[Node]]
+        last_node_of_step = {}  # type: Dict[Step, Node]
+        for node in nodes:
+            dependencies = {
+                predecessor
+                for predecessor in self._nodes_predecessors[node]
+                if predecessor in nodes_set
+            }
+            if node.step in last_node_of_step:
+                dependencies.add(last_node_of_step[node.step])
+            last_node_of_step[node.step] = node
+
+            n_pending[node] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(node)
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            running = {
+                executor.submit(execute_node, node): node
+                for node in nodes
+                if n_pending[node] == 0
+            }
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    future.result()  # re-raise any exception of the node
+                    for dependent in dependents[node]:
+                        n_pending[dependent] -= 1
+                        if n_pending[dependent] == 0:
+                            future = executor.submit(execute_node, dependent)
+                            running[future] = dependent
+
+    def _get_n_workers(self) -> int:
+        if self.n_jobs is None:
+            return 1
+        if self.n_jobs < 0:
+            return max((os.cpu_count() or 1) + 1 + self.n_jobs, 1)
+        return self.n_jobs
+
+    def _get_version(self):
+        # A model changes whenever any of its steps does
+        return (
+            self._version,
+            tuple(step._get_version() for step in self._steps.values()),
+        )
+
+    def _clear_compute_cache(self):
+        if self._compute_cache is not None:
+            self._compute_cache.clear()
+
+    def _make_results_cache(
+        self, *data: Dict[DataPlaceholder, ArrayLike]
+    ) -> List[Optional[ArrayLike]]:
+        results_cache = [None] * len(self._slots)  # type: List[Optional[ArrayLike]]
+        for data_norm in data:
+            for data_placeholder, value in data_norm.items():
+                results_cache[self._slots[data_placeholder]] = value
+        return results_cache
+
     @try_and_raise_with_cause(action="fit")
     def _fit_node(self, node, Xs, ys, **fit_params):
+        node.step._bump_version()
         if ys:
             node.fit_func(unlistify(Xs), unlistify(ys), **fit_params)
         else:
@@ -495,25 +667,31 @@ class Model(Step):
         # TODO: Some regressors have extra options in their predict method, and they return a tuple of arrays.
         # https://scikit-learn.org/stable/glossary.html#term-predict
         output_data = node.compute_func(unlistify(Xs))
-        output_data = listify(output_data)
+        if not isinstance(output_data, (list, tuple)):
+            # Avoid a list allocation in the common single-output case
+            output_data = (output_data,)
         self._update_cache(cache, output_data, node)
+        return output_data
 
     @try_and_raise_with_cause(action="fit_compute")
     def _fit_compute_node(self, node, Xs, ys, cache, **fit_params):
         # TODO: same as _compute_node TODO?
+        node.step._bump_version()
         if ys:
             output_data = node.fit_compute_func(
                 unlistify(Xs), unlistify(ys), **fit_params
             )
         else:
             output_data = node.fit_compute_func(unlistify(Xs), **fit_params)
-        output_data = listify(output_data)
+        if not isinstance(output_data, (list, tuple)):
+            output_data = (output_data,)
         self._update_cache(cache, output_data, node)
 
-    @staticmethod
-    def _update_cache(cache, output_data, node):
+    def _update_cache(self, cache, output_data, node):
+        output_slots = self._node_slots[node][2]
         try:
-            cache.update(safezip2(node.outputs, output_data))
+            for slot, value in safezip2(output_slots, output_data):
+                cache[slot] = value
         except ValueError as e:
             message = (
                 "The number of output data elements ({}) does not match "
@@ -585,6 +763,10 @@ class Model(Step):
             step = self.get_step(step_name)
             step.set_params(**params)
 
+        # Steps (or their params) changed so any cached outputs become stale
+        self._clear_compute_cache()
+        self._bump_version()
+
         return self
 
     def _replace_step(self, step_key, new_step):
@@ -610,7 +792,7 @@ class Model(Step):
 def build_graph_from_outputs(outputs: Iterable[DataPlaceholder]) -> DiGraph:
     """Builds a graph by backtracking from a sets of outputs.
 
-    It does so by backtracking recursively in depth-first fashion, jumping
+    It does so by backtracking iteratively in depth-first fashion, jumping
     from outputs to steps in tandem until hitting a step with no inputs (an
     InputStep).
 
@@ -630,32 +812,28 @@ def build_graph_from_outputs(outputs: Iterable[DataPlaceholder]) -> DiGraph:
     graph = DiGraph()
 
     # Add nodes (a node represents a step at a given port)
-    def collect_nodes_from(output):
-        parent_node = output.node
+    # The stack is fed in reverse order so the nodes are added in the
+    # same (pre)order a recursive depth-first search would add them.
+    stack = [output.node for output in reversed(list(outputs))]
+    while stack:
+        node = stack.pop()
 
-        if parent_node in graph:
-            return
-
-        graph.add_node(parent_node)
-        for input in parent_node.inputs:
-            collect_nodes_from(input)
-        for target in parent_node.targets:
-            collect_nodes_from(target)
+        if node in graph:
+            continue
 
-    for output in outputs:
-        collect_nodes_from(output)
+        graph.add_node(node)
+        parents = node.inputs + node.targets
+        stack.extend(parent.node for parent in reversed(parents))
 
-    # Add edges (data)
+    # Add edges (data) and check that there are no steps with the same name
+    steps_seen = {}  # type: Dict[str, Step]
+    duplicated_names = []
     for node in graph:
         for input in node.inputs:
             graph.add_edge(input.node, node, input)
         for target in node.targets:
             graph.add_edge(target.node, node, target)
 
-    # Check that there are no steps with the same name
-    steps_seen = {}  # type: Dict[str, Step]
-    duplicated_names = []
-    for node in graph:
         step_name = node.step.name
         if step_name not in steps_seen:
             steps_seen[step_name] = node.step
@@ -21,6 +21,9 @@ class _StepBase:
         # TODO: Add self.n_inputs? Could be used to check inputs in __call__
         self._n_outputs = n_outputs
         self._nodes = []  # type: List[Node]
+        # Bumped whenever the step state may have changed (fit/set_params),
+        # so data computed from the step (e.g. cached outputs) can be invalidated
+        self._version = 0
 
     def _generate_unique_name(self):
         name = self.__class__.__name__
@@ -38,6 +41,19 @@ class _StepBase:
         # For testing purposes only.
         cls._names.clear()
 
+    def _bump_version(self):
+        self._version += 1
+
+    def _get_version(self):
+        return self._version
+
+    def set_params(self, **params):
+        """Set the parameters of the step. This is a thin wrapper over the
+        parent class method that also bumps the step version.
+        """
+        self._bump_version()
+        return super().set_params(**params)  # type: ignore
+
     def _get_param_names(self):
         """This is a workaround to override @classmethod binding of the sklearn
         parent class method so we can feed it the sklearn parent class instead
@@ -1,4 +1,9 @@
-from typing import Union, Any, List, Tuple
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Union, Any, List, Tuple, Optional
+
+import numpy as np
 
 
 def listify(x: Union[Any, List[Any], Tuple[Any, ...]]) -> List[Any]:
@@ -90,3 +95,76 @@ class SimpleCache:
     @property
     def misses(self):
         return self._misses
+
+
+class LRUCache:
+    """A thread-safe, least-recently-used cache of bounded size that updates its
+    stats upon retrieval. The cached items are not pickled along with the cache.
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self._maxsize = maxsize
+        self._hits = 0
+        self._misses = 0
+        self._cache = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._cache:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self._misses += 1
+            return default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def __getstate__(self):
+        return {"_maxsize": self._maxsize, "_hits": self._hits, "_misses": self._misses}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+
+def hash_data(x: Any) -> Optional[str]:
+    """Computes a digest of the contents of the given data from its buffer.
+
+    Only numpy arrays without object fields can be hashed cheaply this way.
+    None is returned for any other data.
+    """
+    if not isinstance(x, np.ndarray) or x.dtype.hasobject:
+        return None
+    hasher = hashlib.sha1()
+    hasher.update(x.dtype.str.encode())
+    hasher.update(str(x.shape).encode())
+    hasher.update(np.ascontiguousarray(x).data)
+    return hasher.hexdigest()
@@ -1,4 +1,8 @@
-from baikal import Step
+import pickle
+
+import pytest
+
+from baikal import Step, Input
 from baikal._core.data_placeholder import DataPlaceholder
 
 
@@ -11,3 +15,24 @@ def test_repr():
     data_placeholder = DataPlaceholder(step, 1, "some-step:1/0")
     expected_repr = "DataPlaceholder(step=DummyStep(name='some-step', n_outputs=1), port=1, name='some-step:1/0')"
     assert repr(data_placeholder) == expected_repr
+
+
+def test_slots():
+    class DummyStep(Step):
+        def somefunc(self, X):
+            pass
+
+    step = DummyStep(name="some-step")
+    data_placeholder = DataPlaceholder(step, 1, "some-step:1/0")
+    assert not hasattr(data_placeholder, "__dict__")
+    with pytest.raises(AttributeError):
+        data_placeholder.foo = 123
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle(protocol):
+    data_placeholder = Input(name="x")
+    data_placeholder_loaded = pickle.loads(pickle.dumps(data_placeholder, protocol))
+    assert data_placeholder_loaded.name == "x"
+    assert data_placeholder_loaded.port == 0
+    assert data_placeholder_loaded.step.name == "x"
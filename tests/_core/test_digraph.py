@@ -191,6 +191,17 @@ def test_topological_sort_cyclic_graph():
         graph.topological_sort()
 
 
+def test_topological_sort_deep_graph():
+    graph = DiGraph()
+    n_nodes = 5000  # deeper than the default recursion limit
+    for node in range(n_nodes):
+        graph.add_node(node)
+    for node in range(n_nodes - 1):
+        graph.add_edge(node, node + 1)
+
+    assert graph.topological_sort() == list(range(n_nodes))
+
+
 def test_node_ordering():
     graph = DiGraph()
     nodes = [10, 0, 20, 40, 30]
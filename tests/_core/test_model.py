@@ -1,6 +1,9 @@
 import pickle
 import tempfile
+import threading
+import time
 from contextlib import contextmanager
+from functools import partial
 from typing import List, Dict
 
 import joblib
@@ -610,6 +613,94 @@ def test_steps_cache(teardown):
     assert model._nodes_cache.hits == hits and model._nodes_cache.misses == misses
 
 
+def test_compute_cache(teardown):
+    x_data = iris.data
+    y_t_data = iris.target
+
+    x = Input()
+    y_t = Input()
+    h = PCA(n_components=2, name="PCA")(x)
+    y = LogisticRegression(name="LogReg")(h, y_t)
+    model = Model(x, y, y_t, cache_size=8)
+    model.fit(x_data, y_t_data)
+
+    # 1) first call computes every step
+    y_pred = model.predict(x_data)
+    assert model._compute_cache.hits == 0 and model._compute_cache.misses == 2
+
+    # 2) same (but not the same object) data, hence hits
+    assert_array_equal(model.predict(x_data.copy()), y_pred)
+    assert model._compute_cache.hits == 2 and model._compute_cache.misses == 2
+
+    # 3) different data, hence misses
+    model.predict(x_data[:10])
+    assert model._compute_cache.hits == 2 and model._compute_cache.misses == 4
+
+    # 4) refitting and setting params invalidate the cache
+    model.fit(x_data[:100], y_t_data[:100])
+    assert len(model._compute_cache) == 0
+    model.predict(x_data)
+    model.set_params(LogReg__C=0.5)
+    assert len(model._compute_cache) == 0
+
+
+def test_compute_cache_with_shared_step(teardown):
+    X_data = np.array([[1.0], [3.0]])
+
+    x = Input()
+    scaler = StandardScaler()
+    z = scaler(x)
+    big = Model(x, z, cache_size=4)
+    big.fit(X_data)
+    assert_allclose(big.predict(X_data), np.array([[-1.0], [1.0]]))
+
+    # Re-fitting the step through another model is detected
+    small = Model(x, z)
+    small.fit(X_data * 100)
+    assert_allclose(big.predict(X_data), small.predict(X_data))
+    assert_allclose(big.predict(X_data), np.array([[-1.99], [-1.97]]))
+
+    # Setting the step params directly is detected
+    scaler.set_params(with_mean=False)
+    assert_allclose(big.predict(X_data), np.array([[0.01], [0.03]]))
+
+    # Steps nested in sub-models are also detected
+    outer = Model(x, big(x), cache_size=4)
+    outer.predict(X_data)
+    small.fit(X_data)
+    assert_allclose(outer.predict(X_data), small.predict(X_data))
+
+
+def test_compute_cache_with_unhashable_input(teardown):
+    x = Input()
+    h = Lambda(lambda X: [X])(x)
+    y = Lambda(lambda X: X[0](1))(h)
+    model = Model(x, y, cache_size=4)
+
+    # Non-array, non-picklable input is computed without caching
+    x_data = {x: [lambda v: v + 1]}
+    assert model.predict(x_data) == 2
+    assert model.predict(x_data) == 2
+    assert model._compute_cache.hits == 0 and model._compute_cache.misses == 0
+
+
+@pytest.mark.parametrize("cache_size", [0, -1, 2.5, "3", True])
+def test_model_with_invalid_cache_size(teardown, cache_size):
+    x = Input()
+    y = DummySISO()(x)
+
+    with pytest.raises(ValueError):
+        Model(x, y, cache_size=cache_size)
+
+
+def test_compute_cache_disabled_by_default(teardown):
+    x = Input()
+    y = DummySISO()(x)
+    model = Model(x, y)
+    model.predict(np.array([[1], [2]]))
+    assert model._compute_cache is None
+
+
 def test_multiedge(teardown):
     x = Input()
     z1, z2 = DummySIMO()(x)
@@ -622,6 +713,16 @@ def test_multiedge(teardown):
     assert_array_equal(y_out, np.array([[2], [4]]))
 
 
+def test_deep_model(teardown):
+    x = Input()
+    h = x
+    for _ in range(2000):  # deeper than the default recursion limit
+        h = Lambda(lambda X: X + 1)(h)
+    model = Model(x, h)
+
+    assert_array_equal(model.predict(np.array([0])), np.array([2000]))
+
+
 def test_lazy_model(teardown):
     x_data = np.array([[1, 2], [3, 4]])
 
@@ -660,6 +761,107 @@ def test_fit_predict_with_shared_step(teardown):
     assert_array_equal(model.predict(X_data), X_data)
 
 
+@pytest.mark.parametrize("n_jobs", [2, -1])
+def test_fit_predict_parallel(teardown, n_jobs):
+    x_data = iris.data
+    y_t_data = iris.target
+    random_state = 123
+
+    def build_model(n_jobs):
+        x = Input()
+        y_t = Input()
+        y1 = LogisticRegression(random_state=random_state, solver="liblinear")(x, y_t)
+        y2 = RandomForestClassifier(random_state=random_state)(x, y_t)
+        y3 = ExtraTreesClassifier(random_state=random_state)(x, y_t)
+        features = Stack(axis=1)([y1, y2, y3])
+        y = LogisticRegression(random_state=random_state, solver="liblinear")(
+            features, y_t
+        )
+        return Model(x, y, y_t, n_jobs=n_jobs)
+
+    model_sequential = build_model(None)
+    model_sequential.fit(x_data, y_t_data)
+
+    model_parallel = build_model(n_jobs)
+    model_parallel.fit(x_data, y_t_data)
+
+    assert_array_equal(model_parallel.predict(x_data), model_sequential.predict(x_data))
+
+
+def test_fit_predict_parallel_with_shared_step(teardown):
+    x = Input()
+    scaler = StandardScaler()
+    z = scaler(x, compute_func="transform", trainable=True)
+    y = scaler(z, compute_func="inverse_transform", trainable=False)
+    model = Model(x, y, n_jobs=2)
+
+    X_data = np.array([1, 3, 1, 3]).reshape(-1, 1)
+    model.fit(X_data)
+    assert_array_equal(model.predict(X_data), X_data)
+
+
+def test_predict_parallel_runs_independent_steps_concurrently(teardown):
+    # Each step waits for the other, so this only succeeds if both run at once
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(X):
+        barrier.wait()
+        return X
+
+    x = Input()
+    y1 = Lambda(wait)(x)
+    y2 = Lambda(wait)(x)
+    model = Model(x, [y1, y2], n_jobs=2)
+
+    x_data = np.array([[1], [2]])
+    y1_pred, y2_pred = model.predict(x_data)
+    assert_array_equal(y1_pred, x_data)
+    assert_array_equal(y2_pred, x_data)
+
+
+def test_predict_parallel_does_not_overlap_shared_step(teardown):
+    lock = threading.Lock()
+    n_running = {"shared": 0, "max_shared": 0}
+
+    def shared_func(X):
+        with lock:
+            n_running["shared"] += 1
+            n_running["max_shared"] = max(n_running["max_shared"], n_running["shared"])
+        time.sleep(0.05)
+        with lock:
+            n_running["shared"] -= 1
+        return X
+
+    # The shared step is called on independent inputs, so its nodes could
+    # overlap if they were not chained
+    x = Input()
+    shared = Lambda(shared_func)
+    ys = [shared(x) for _ in range(4)]
+    model = Model(x, ys, n_jobs=4)
+
+    model.predict(np.array([[1], [2]]))
+    assert n_running["max_shared"] == 1
+
+
+def test_fit_predict_parallel_with_faulty_step(teardown):
+    x = Input()
+    y1 = DummySISO()(x)
+    y2 = DummyStepWithFaultyPredict()(x)
+    model = Model(x, [y1, y2], n_jobs=2)
+
+    with raises_with_cause(RuntimeError, KeyError):
+        model.predict(np.array([[1], [2]]))
+
+
+@pytest.mark.parametrize("n_jobs", [0, 1.5, "2", True])
+def test_model_with_invalid_n_jobs(teardown, n_jobs):
+    x = Input()
+    y = DummySISO()(x)
+
+    with pytest.raises(ValueError):
+        Model(x, y, n_jobs=n_jobs)
+
+
 def test_fit_and_predict_model_with_no_fittable_steps(teardown):
     X_data = np.array([[1, 2], [3, 4]])
     y_expected = np.array([[2, 4], [6, 8]])
@@ -918,7 +1120,12 @@ def test_nested_model_stack(teardown):
 
 
 @pytest.mark.parametrize(
-    "dump,load", [(joblib.dump, joblib.load), (pickle.dump, pickle.load)]
+    "dump,load",
+    [
+        (joblib.dump, joblib.load),
+        (pickle.dump, pickle.load),
+        (partial(pickle.dump, protocol=1), pickle.load),
+    ],
 )
 def test_model_joblib_serialization(teardown, dump, load):
     x_data = iris.data
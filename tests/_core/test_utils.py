@@ -1,5 +1,7 @@
+import pickle
 from contextlib import contextmanager
 
+import numpy as np
 import pytest
 
 from baikal._core.utils import (
@@ -8,7 +10,9 @@ from baikal._core.utils import (
     safezip2,
     find_duplicated_items,
     SimpleCache,
+    LRUCache,
     make_name,
+    hash_data,
 )
 
 
@@ -72,3 +76,49 @@ def test_simple_cache():
     assert cache.hits == 1 and cache.misses == 1
     with pytest.raises(KeyError):
         cache["b"]
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    assert cache.hits == 0 and cache.misses == 0
+    assert cache.get("a") is None
+    assert cache.hits == 0 and cache.misses == 1
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+    # "b" is the least recently used, so it is evicted
+    cache["c"] = 3
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.clear()
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_lru_cache_pickle():
+    cache = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache = pickle.loads(pickle.dumps(cache))
+    assert cache.maxsize == 2
+    assert len(cache) == 0
+    cache["a"] = 1
+    assert cache.get("a") == 1
+
+
+def test_hash_data():
+    x = np.arange(6).reshape(2, 3)
+    assert hash_data(x) == hash_data(x.copy())
+    assert hash_data(x) == hash_data(np.asfortranarray(x))
+    assert hash_data(x) != hash_data(x.reshape(3, 2))
+    assert hash_data(x) != hash_data(x.astype(float))
+    assert hash_data(x) != hash_data(x + 1)
+    assert hash_data([1, 2]) is None
+    assert hash_data(np.array([lambda x: x])) is None
+    structured = np.array([(1, "a")], dtype=[("a", int), ("b", object)])
+    assert hash_data(structured) is None